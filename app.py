@@ -1,15 +1,19 @@
 import sys
 import os
-from datetime import datetime
+import time
+from functools import lru_cache
+from pathlib import Path
 from PySide6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                                QHBoxLayout, QLabel, QPushButton, QLineEdit, 
-                               QTextEdit, QProgressBar, QFileDialog, QFrame)
-from PySide6.QtCore import Qt
-from PySide6.QtGui import QFont, QTextCursor
+                               QPlainTextEdit, QProgressBar, QFileDialog, QFrame)
+from PySide6.QtCore import Qt, QTimer
+from PySide6.QtGui import QFont, QFontDatabase, QTextCursor
 from backend import OrganizerWorker
 
 # --- Constants & Theme Config ---
-FONT_FAMILY = "Fira Code"
+FONT_FAMILY = "Fira Code" # Used when bundled or installed, else the system monospace font
+# Optional bundled font (PyInstaller unpacks data files under sys._MEIPASS)
+FONT_PATH = Path(getattr(sys, "_MEIPASS", Path(__file__).parent)) / "assets" / "FiraCode-Regular.ttf"
 COLOR_BG_MAIN = "#343541"
 COLOR_BG_SIDEBAR = "#202123"
 COLOR_BTN_PRIMARY = "#ffffff"
@@ -18,14 +22,28 @@ COLOR_TEXT_PRIMARY = "#ececf1"
 COLOR_TEXT_SECONDARY = "#acacbe"
 COLOR_BORDER = "#565869"
 CORNER_RADIUS = "8px"
+CONSOLE_MAX_LINES = 1000 # Oldest lines are trimmed past this
+LOG_FLUSH_MS = 50 # How often buffered worker logs are pulled into the console
 
 # --- Stylesheet (QSS) ---
-STYLESHEET = f"""
+def resolve_font_family() -> str:
+    """Picks a font family that exists, so Qt never has to search for a substitute."""
+    if FONT_PATH.exists():
+        families = QFontDatabase.applicationFontFamilies(QFontDatabase.addApplicationFont(str(FONT_PATH)))
+        if families: return families[0]
+    if FONT_FAMILY in QFontDatabase.families():
+        return FONT_FAMILY
+    return QFontDatabase.systemFont(QFontDatabase.SystemFont.FixedFont).family()
+
+@lru_cache(maxsize=None)
+def build_stylesheet(font_family: str):
+    """Builds the QSS once per font; every window reuses the same string."""
+    return f"""
 QMainWindow {{
     background-color: {COLOR_BG_MAIN};
 }}
 QWidget {{
-    font-family: "{FONT_FAMILY}", monospace;
+    font-family: "{font_family}", monospace;
     font-size: 14px;
     color: {COLOR_TEXT_PRIMARY};
 }}
@@ -98,13 +116,13 @@ QProgressBar::chunk {{
     background-color: {COLOR_BTN_PRIMARY};
     border-radius: 4px;
 }}
-QTextEdit {{
+QPlainTextEdit {{
     background-color: #40414f;
     border: 1px solid {COLOR_BORDER};
     border-radius: {CORNER_RADIUS};
     color: #d1d5db;
     padding: 10px;
-    font-family: "{FONT_FAMILY}", monospace;
+    font-family: "{font_family}", monospace;
     font-size: 12px;
 }}
 /* Stats Labels */
@@ -130,12 +148,19 @@ class MainWindow(QMainWindow):
         self.current_mode = "ai" # Default
         self.worker = None
         self.last_log_was_progress = False
+        self._ts_cache = (-1, "") # (epoch second, "HH:MM:SS")
+        self._last_prog_int = -1
+
+        # Worker logs are buffered and flushed in batches
+        self.log_timer = QTimer(self)
+        self.log_timer.setInterval(LOG_FLUSH_MS)
+        self.log_timer.timeout.connect(self.flush_logs)
 
         self.init_ui()
         self.setup_styles()
 
     def setup_styles(self):
-        self.setStyleSheet(STYLESHEET)
+        self.setStyleSheet(build_stylesheet(QApplication.font().family()))
 
     def init_ui(self):
         # Main Layout Container
@@ -247,8 +272,9 @@ class MainWindow(QMainWindow):
         console_lbl.setStyleSheet(f"font-size: 11px; font-weight: bold; color: {COLOR_TEXT_SECONDARY}; margin-top: 20px;")
         content_layout.addWidget(console_lbl)
 
-        self.console = QTextEdit()
+        self.console = QPlainTextEdit()
         self.console.setReadOnly(True)
+        self.console.setMaximumBlockCount(CONSOLE_MAX_LINES)
         content_layout.addWidget(self.console)
 
         main_layout.addWidget(content_area)
@@ -298,36 +324,72 @@ class MainWindow(QMainWindow):
             self.log_message(f"Selected target: {folder}")
 
     def log_message(self, message):
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        formatted_msg = f"[{timestamp}] {message}"
-        
-        # Check if this is a download progress message
-        is_progress = "Downloading:" in message
-        
-        # Get the cursor from the console text edit
-        cursor = self.console.textCursor()
-        
-        # Move to the end of the document
-        cursor.movePosition(QTextCursor.MoveOperation.End)
+        self.append_log_lines([message])
+
+    def flush_logs(self):
+        """Pulls all pending worker logs into the console in one update."""
+        if self.worker is None: return
+        batch = self.worker.drain_logs()
+        if batch:
+            self.append_log_lines(batch)
+
+    def log_timestamp(self):
+        """Local HH:MM:SS, only re-formatted when the second changes."""
+        now = int(time.time())
+        if now != self._ts_cache[0]:
+            self._ts_cache = (now, time.strftime("%H:%M:%S", time.localtime(now)))
+        return self._ts_cache[1]
+
+    def append_log_lines(self, messages):
+        lines = []
+        overwrite_last = False
+        prefix = "".join(("[", self.log_timestamp(), "] "))
+
+        # Only follow new output if the user hasn't scrolled up
+        sb = self.console.verticalScrollBar()
+        at_bottom = sb.value() >= sb.maximum() - 4
+
+        for message in messages:
+            formatted_msg = prefix + message
+
+            # Check if this is a download progress message
+            is_progress = "Downloading:" in message
+
+            if self.last_log_was_progress and is_progress:
+                # Consecutive progress lines collapse into the latest one
+                if lines:
+                    lines[-1] = formatted_msg
+                else:
+                    overwrite_last = True
+                    lines.append(formatted_msg)
+            else:
+                lines.append(formatted_msg)
+
+            # Update state
+            self.last_log_was_progress = is_progress
+
+        if overwrite_last:
+            # Get the cursor from the console text edit
+            cursor = self.console.textCursor()
+
+            # Move to the end of the document
+            cursor.movePosition(QTextCursor.MoveOperation.End)
 
-        if self.last_log_was_progress and is_progress:
             # Select the text from End back to StartOfBlock to overwrite it
             cursor.movePosition(
                 QTextCursor.MoveOperation.StartOfBlock, 
                 QTextCursor.MoveMode.KeepAnchor
             )
             cursor.removeSelectedText()
-            cursor.insertText(formatted_msg)
-        else:
-            # Standard append (creates new line)
-            self.console.append(formatted_msg)
+            cursor.insertText(lines.pop(0))
 
-        # Update state
-        self.last_log_was_progress = is_progress
+        if lines:
+            # Standard append (one document update for the whole batch)
+            self.console.appendPlainText("\n".join(lines))
 
         # Auto scroll
-        sb = self.console.verticalScrollBar()
-        sb.setValue(sb.maximum())
+        if at_bottom:
+            sb.setValue(sb.maximum())
 
     def start_process(self):
         if self.selected_path == "Select a folder to organize" or not os.path.exists(self.selected_path):
@@ -343,16 +405,24 @@ class MainWindow(QMainWindow):
         
         self.console.clear()
         self.progress_bar.setValue(0)
+        self._last_prog_int = 0
         self.reset_stats()
 
         # Start Worker
         self.worker = OrganizerWorker(self.selected_path, self.current_mode)
-        self.worker.log_signal.connect(self.log_message)
-        self.worker.progress_signal.connect(lambda p: self.progress_bar.setValue(int(p * 100)))
-        self.worker.stats_signal.connect(self.update_stats)
+        self.worker.log_signal.connect(self.flush_logs)
+        self.worker.state_signal.connect(self.update_state, Qt.QueuedConnection) # type: ignore
         self.worker.finished_signal.connect(self.on_process_finished)
         self.worker.error_signal.connect(self.on_process_error)
         self.worker.start()
+        self.log_timer.start()
+
+    def update_state(self, state):
+        progress, total, processed, groups = state
+        if progress != self._last_prog_int:
+            self._last_prog_int = progress
+            self.progress_bar.setValue(progress)
+        self.update_stats(total, processed, groups)
 
     def update_stats(self, total, processed, groups):
         self.lbl_total_val.setText(str(total))
@@ -363,11 +433,15 @@ class MainWindow(QMainWindow):
         self.update_stats(0, 0, 0)
 
     def on_process_finished(self):
+        self.log_timer.stop()
+        self.flush_logs()
         self.start_btn.setEnabled(True)
         self.start_btn.setText("START ORGANIZATION")
         self.log_message("Done.")
 
     def on_process_error(self, msg):
+        self.log_timer.stop()
+        self.flush_logs()
         self.log_message(f"ERROR: {msg}")
         self.start_btn.setEnabled(True)
         self.start_btn.setText("START ORGANIZATION")
@@ -395,7 +469,7 @@ if __name__ == "__main__":
     app = QApplication(sys.argv)
     
     # Load Font (Optional: Falls back to system monospace if not found)
-    font_db = QFont(FONT_FAMILY)
+    font_db = QFont(resolve_font_family())
     font_db.setStyleHint(QFont.Monospace) # type: ignore
     app.setFont(font_db)
 
@@ -1,15 +1,48 @@
 import os
 import shutil
+import itertools
+import threading
 import time
 from pathlib import Path
 from datetime import datetime
+from typing import List
 from PySide6.QtCore import QThread, Signal
 import worker as backend
 
+PROGRESS_INTERVAL = 0.033 # Max ~30 UI updates per second
+LOG_BATCH_SIZE = 16 # Nudge the UI once this many log lines are pending
+LOG_FLUSH_INTERVAL = 0.1 # ...or once this many seconds have passed
+
+# Binary/media files sorted without AI (Phase 1)
+MEDIA_MAP: dict[str, frozenset[str]] = {
+    'Images': frozenset({'.jpg', '.jpeg', '.png', '.gif', '.svg', '.webp'}),
+    'Videos': frozenset({'.mp4', '.mkv', '.mov', '.avi', '.wmv'}),
+    'Audio':  frozenset({'.mp3', '.wav', '.flac'}),
+    'Execs':  frozenset({'.exe', '.msi', '.bat', '.sh', '.bin', '.iso'}),
+    'Archives': frozenset({'.zip', '.rar', '.7z', '.tar', '.gz'})
+}
+EXT_TO_FOLDER = {ext: folder for folder, exts in MEDIA_MAP.items() for ext in exts}
+
+def _move_no_clobber(src: str, dest: str):
+    """Renames src to dest, raising FileExistsError instead of replacing dest."""
+    try:
+        if os.name == "nt":
+            os.rename(src, dest) # Windows refuses to replace an existing file
+            return
+        os.link(src, dest) # POSIX rename would silently replace, link does not
+    except FileExistsError:
+        raise
+    except OSError:
+        # Cross-device move (EXDEV) or a filesystem without hard links
+        if os.path.lexists(dest):
+            raise FileExistsError(dest)
+        shutil.move(src, dest)
+        return
+    os.unlink(src)
+
 class OrganizerWorker(QThread):
-    log_signal = Signal(str)
-    progress_signal = Signal(float)
-    stats_signal = Signal(int, int, int) # total, processed, groups
+    log_signal = Signal() # Logs pending, fetch them with drain_logs()
+    state_signal = Signal(tuple) # (progress 0-100, total, processed, groups)
     finished_signal = Signal()
     error_signal = Signal(str)
 
@@ -18,77 +51,110 @@ class OrganizerWorker(QThread):
         self.path_str = path_str
         self.mode = mode
         self.is_running = True
+        self._last_emit_ts = 0.0
+        self._last_emit_state = None
+        self._latest_progress = None
+        self._log_buf = []
+        self._log_lock = threading.Lock()
+        self._last_log_emit = 0.0
+        self._nudged = False # log_signal sent and not drained yet
+        self._created_dirs: set[str] = set()
+        self._target_str_cache: dict[str, str] = {}
+        self._dir_counters: dict[str, itertools.count] = {}
+        self._cache_moves: list[tuple[str, str]] = [] # (old, new) cache keys of moved AI documents
 
     def log(self, msg):
-        self.log_signal.emit(msg)
+        now = time.monotonic()
+        with self._log_lock:
+            self._log_buf.append(msg)
+            # One nudge per batch: the GUI hasn't drained since the last one
+            if self._nudged: return
+            if len(self._log_buf) < LOG_BATCH_SIZE and now - self._last_log_emit <= LOG_FLUSH_INTERVAL:
+                return
+            self._nudged = True
+            self._last_log_emit = now
+
+        self.log_signal.emit()
+
+    def drain_logs(self):
+        """Returns and clears all buffered log lines (thread-safe)."""
+        with self._log_lock:
+            batch, self._log_buf = self._log_buf, []
+            self._nudged = False
+        return batch
 
     def run(self):
         """Main Thread Execution Entry Point"""
         try:
-            path = Path(self.path_str)
-            files = backend.scan_files(self.path_str)
+            files = list(backend.scan_files(self.path_str))
             total_files = len(files)
             
             if total_files == 0:
                 self.error_signal.emit("No files found in directory.")
                 return
 
-            self.stats_signal.emit(total_files, 0, 0)
+            self.state_signal.emit((0, total_files, 0, 0))
             self.log(f"Found {total_files} files. Mode: '{self.mode}'")
 
             if self.mode == "type":
-                self._process_type(path, files)
+                self._process_type(files)
             elif self.mode == "date":
-                self._process_date(path, files)
+                self._process_date(files)
             elif self.mode == "ai":
-                self._process_ai(path, files)
+                try:
+                    self._process_ai(files)
+                finally:
+                    # Keep cached text/vectors attached to the files that moved
+                    backend.file_cache.relocate(self._cache_moves)
             
+            self._flush_progress()
             self.log("✅ Task Completed.")
             self.finished_signal.emit()
 
         except Exception as e:
+            self._flush_progress()
             self.error_signal.emit(f"Critical Error: {str(e)}")
 
     def stop(self):
         self.is_running = False
 
     # --- MODE 1: FILE TYPE ---
-    def _process_type(self, path, files):
-        groups = set()
-        for i, f in enumerate(files):
+    def _process_type(self, files):
+        groups_count = 0
+        for i, entry in enumerate(files):
             if not self.is_running: break
             try:
-                ext = f.suffix.lower().strip('.') or "no_extension"
-                target = path / ext
-                target.mkdir(exist_ok=True)
-                
-                self._safe_move(f, target)
-                groups.add(ext)
+                ext = os.path.splitext(entry.name)[1][1:].lower() or "no_extension"
+                target = self._target(ext)
+                groups_count += self._ensure_dir(target)
                 
-                self._update_progress(i + 1, len(files), len(groups))
+                self._safe_move(entry.path, target)
             except Exception as e:
                 self.log(f"Error: {e}")
+            
+            self._update_progress(i + 1, len(files), groups_count)
+        self._flush_progress()
 
     # --- MODE 2: DATE ---
-    def _process_date(self, path, files):
-        groups = set()
-        for i, f in enumerate(files):
+    def _process_date(self, files):
+        groups_count = 0
+        for i, entry in enumerate(files):
             if not self.is_running: break
             try:
-                ts = os.path.getmtime(f)
-                folder = datetime.fromtimestamp(ts).strftime("%Y-%m")
-                target = path / folder
-                target.mkdir(exist_ok=True)
-                
-                self._safe_move(f, target)
-                groups.add(folder)
+                mtime = entry.stat(follow_symlinks=False).st_mtime
+                folder = datetime.fromtimestamp(mtime).strftime("%Y-%m")
+                target = self._target(folder)
+                groups_count += self._ensure_dir(target)
                 
-                self._update_progress(i + 1, len(files), len(groups))
+                self._safe_move(entry.path, target)
             except Exception as e:
                 self.log(f"Error: {e}")
+            
+            self._update_progress(i + 1, len(files), groups_count)
+        self._flush_progress()
 
     # --- MODE 3: AI CLUSTERING ---
-    def _process_ai(self, path, files):
+    def _process_ai(self, files):
         # 1. Check/Download Models
         is_ready, missing = backend.check_local_model_ready()
         if not is_ready:
@@ -97,45 +163,39 @@ class OrganizerWorker(QThread):
                 if not self.is_running: return
                 self.log(status)
         
+        # Load the models in the background while Phase 1 and extraction run
+        backend.prewarm()
+        
         total = len(files)
         ai_candidates = []  
         processed_count = 0
-        groups_created = set()
+        groups_count = 0
 
         # 2. Hardcoded Phase (Fast)
         self.log("📦 Phase 1: Sorting Binaries & Media...")
-        
-        media_map = {
-            'Images': ['.jpg', '.jpeg', '.png', '.gif', '.svg', '.webp'],
-            'Videos': ['.mp4', '.mkv', '.mov', '.avi', '.wmv'],
-            'Audio':  ['.mp3', '.wav', '.flac'],
-            'Execs':  ['.exe', '.msi', '.bat', '.sh', '.bin', '.iso'],
-            'Archives': ['.zip', '.rar', '.7z', '.tar', '.gz']
-        }
-
-        for i, f in enumerate(files):
+
+        for i, entry in enumerate(files):
             if not self.is_running: break
             
-            suffix = f.suffix.lower()
-            moved = False
+            folder = EXT_TO_FOLDER.get(os.path.splitext(entry.name)[1].lower())
             
-            for folder, exts in media_map.items():
-                if suffix in exts:
-                    target = path / folder
-                    target.mkdir(exist_ok=True)
-                    self._safe_move(f, target)
-                    groups_created.add(folder)
-                    moved = True
-                    break
-            
-            if moved:
+            if folder is not None:
+                target = self._target(folder)
+                groups_count += self._ensure_dir(target)
+                self._safe_move(entry.path, target)
+                processed_count += 1
+            elif entry.stat(follow_symlinks=False).st_size == 0:
+                # Empty file, nothing to extract
+                target = self._target("Misc_Files")
+                self._ensure_dir(target)
+                self._safe_move(entry.path, target)
                 processed_count += 1
             else:
-                ai_candidates.append(f)
+                ai_candidates.append(Path(entry.path))
 
             # Update stats (First 10% of progress bar)
-            self.progress_signal.emit((i / total) * 0.10)
-            self.stats_signal.emit(total, processed_count, len(groups_created))
+            self._maybe_emit_progress(((i + 1) / total) * 0.10, total, processed_count, groups_count)
+        self._flush_progress()
 
         if not ai_candidates: return
 
@@ -143,44 +203,47 @@ class OrganizerWorker(QThread):
         ai_total = len(ai_candidates)
         self.log(f"🧠 Phase 2: AI Processing for {ai_total} documents...")
 
-        # A. Extract Text
+        # A. Extract Text (threaded: overlaps disk waits and parsing across files)
+        def on_extracted(done, count):
+            # Progress 10% -> 40%
+            prog = 0.10 + (done / count) * 0.30
+            self._maybe_emit_progress(prog, total, processed_count, groups_count)
+            return self.is_running
+
+        extracted = backend.extract_texts(ai_candidates, progress_cb=on_extracted)
+        self._flush_progress()
+        if not self.is_running: return
+
         texts = []
         valid_files = []
         
-        for i, f in enumerate(ai_candidates):
-            if not self.is_running: break
-            
-            txt = backend.extract_text(f)
+        for f, txt in zip(ai_candidates, extracted):
             if len(txt) > 10: # Only process if we found text
                 texts.append(txt)
                 valid_files.append(f)
             else:
                 # No text found? Move to misc
-                target = path / "Misc_Files"
-                target.mkdir(exist_ok=True)
-                self._safe_move(f, target)
+                target = self._target("Misc_Files")
+                self._ensure_dir(target)
+                self._cache_moves.append((str(f), str(Path(self._safe_move(str(f), target)))))
                 processed_count += 1
-            
-            # Progress 10% -> 40%
-            prog = 0.10 + (i / ai_total) * 0.30
-            self.progress_signal.emit(prog)
+        prog = 0.10 + (len(extracted) / ai_total) * 0.30
+        self._maybe_emit_progress(prog, total, processed_count, groups_count, force=True)
 
         if not valid_files: return
 
         # B. Generate Embeddings (Vectorization)
-        # Note: We do this one-by-one to keep UI responsive, 
-        # but SentenceTransformer is fast enough that it won't matter much.
+        # Batched encode of files not in the embedding cache; progress per batch.
         self.log("  • Generating Semantic Vectors...")
-        embeddings = []
-        for i, txt in enumerate(texts):
-            if not self.is_running: break
-            
-            emb = backend.generate_embedding(txt)
-            embeddings.append(emb)
-            
+
+        def on_batch(done, count):
             # Progress 40% -> 70%
-            prog = 0.40 + (i / len(texts)) * 0.30
-            self.progress_signal.emit(prog)
+            prog = 0.40 + (done / count) * 0.30
+            self._maybe_emit_progress(prog, total, processed_count, groups_count)
+            return self.is_running
+
+        embeddings = backend.embed_documents(valid_files, texts, progress_cb=on_batch)
+        self._flush_progress()
 
         if not self.is_running: return
 
@@ -198,37 +261,122 @@ class OrganizerWorker(QThread):
             if label not in clusters: clusters[label] = []
             clusters[label].append(idx)
 
-        # Process each cluster
-        for i, (label, indices) in enumerate(clusters.items()):
+        cluster_indices = list(clusters.values())
+        cluster_inputs = [
+            ([valid_files[x] for x in indices], [texts[x] for x in indices])
+            for indices in cluster_indices
+        ]
+
+        # Name all groups (several clusters per LLM prompt)
+        self.log(f"  • Naming {len(cluster_inputs)} groups...")
+
+        def on_named(done, count):
+            # Progress 70% -> 95%
+            self.log(f"  • Named {done}/{count} groups")
+            prog = 0.70 + (done / count) * 0.25
+            self._maybe_emit_progress(prog, total, processed_count, groups_count)
+            return self.is_running
+
+        folder_names = backend.name_clusters(cluster_inputs, progress_cb=on_named)
+        self._flush_progress()
+
+        # Move each cluster
+        for i, ((cluster_files, _), folder_name) in enumerate(zip(cluster_inputs, folder_names)):
             if not self.is_running: break
             
-            cluster_files = [valid_files[x] for x in indices]
-            cluster_texts = [texts[x] for x in indices]
-            
-            self.log(f"  • Naming Group {i+1}/{len(clusters)}...")
-            folder_name = backend.get_smart_folder_name(cluster_files, cluster_texts)
-            
-            target_dir = path / folder_name
-            target_dir.mkdir(exist_ok=True)
-            groups_created.add(folder_name)
+            target_dir = self._target(folder_name)
+            groups_count += self._ensure_dir(target_dir)
             
-            for f in cluster_files:
-                self._safe_move(f, target_dir)
-                processed_count += 1
+            moved = self._bulk_move(cluster_files, target_dir)
+            self._cache_moves.extend((str(f), str(Path(d))) for f, d in zip(cluster_files, moved))
+            processed_count += len(cluster_files)
             
-            # Progress 70% -> 100%
-            prog = 0.70 + (i / len(clusters)) * 0.30
-            self.progress_signal.emit(prog)
-            self.stats_signal.emit(total, processed_count, len(groups_created))
-
-    def _safe_move(self, src: Path, dest_dir: Path):
-        """Moves file, handling duplicates."""
-        dest = dest_dir / src.name
-        if dest.exists():
-            timestamp = int(time.time())
-            dest = dest_dir / f"{src.stem}_{timestamp}{src.suffix}"
-        shutil.move(str(src), str(dest))
+            # Progress 95% -> 100%
+            prog = 0.95 + ((i + 1) / len(folder_names)) * 0.05
+            self._maybe_emit_progress(prog, total, processed_count, groups_count)
+        self._flush_progress()
+
+    def _target(self, folder: str) -> str:
+        """Target folder path for a group name, joined once per name."""
+        target = self._target_str_cache.get(folder)
+        if target is None:
+            target = self._target_str_cache[folder] = os.path.join(self.path_str, folder)
+        return target
+
+    def _ensure_dir(self, d: str) -> bool:
+        """Creates a target folder once per run. Returns True the first time it is seen."""
+        if d in self._created_dirs:
+            return False
+        os.makedirs(d, exist_ok=True)
+        self._created_dirs.add(d)
+        return True
+
+    def _safe_move(self, src: str, dest_dir: str) -> str:
+        """Moves file, handling duplicates. Only probes names after a collision. Returns the new path."""
+        if os.path.dirname(src) == dest_dir: return src # Already sorted
+        name = os.path.basename(src)
+        dest = os.path.join(dest_dir, name)
+        try:
+            _move_no_clobber(src, dest)
+            return dest
+        except FileExistsError:
+            pass
+
+        # Name taken: append _1, _2, ... using a counter per destination folder
+        stem, ext = os.path.splitext(name)
+        counter = self._dir_counters.setdefault(dest_dir, itertools.count(1))
+        while True:
+            dest = os.path.join(dest_dir, f"{stem}_{next(counter)}{ext}")
+            try:
+                _move_no_clobber(src, dest)
+                return dest
+            except FileExistsError:
+                continue
+
+    def _bulk_move(self, files: List[Path], dest_dir: str) -> List[str]:
+        """Moves a group of files into one folder, resolving name clashes in memory. Returns the new paths."""
+        same_fs = os.stat(files[0].parent).st_dev == os.stat(dest_dir).st_dev
+        taken = set(os.listdir(dest_dir))
+        counter = self._dir_counters.setdefault(dest_dir, itertools.count(1))
+        moved = []
+
+        for f in files:
+            name = f.name
+            while name in taken:
+                name = f"{f.stem}_{next(counter)}{f.suffix}"
+            taken.add(name)
+            dest = os.path.join(dest_dir, name)
+
+            if not same_fs:
+                shutil.move(str(f), dest)
+            else:
+                try:
+                    _move_no_clobber(str(f), dest)
+                except FileExistsError:
+                    # Created since the listing, fall back to probing
+                    dest = self._safe_move(str(f), dest_dir)
+            moved.append(dest)
+        return moved
 
     def _update_progress(self, current, total, groups):
-        self.progress_signal.emit(current / total)
-        self.stats_signal.emit(total, current, groups)
\ No newline at end of file
+        self._maybe_emit_progress(current / total, total, current, groups)
+
+    def _flush_progress(self):
+        """Sends the latest progress even if it was throttled (after a loop ends, breaks or fails)."""
+        if self._latest_progress is not None:
+            self._maybe_emit_progress(*self._latest_progress, force=True)
+
+    def _maybe_emit_progress(self, prog, total, processed, groups, force=False):
+        """Coalesces progress/stats updates to ~30 Hz and drops unchanged ones."""
+        self._latest_progress = (prog, total, processed, groups)
+        state = (int(prog * 100), processed, groups)
+        if state == self._last_emit_state:
+            return
+
+        now = time.monotonic()
+        if not force and now - self._last_emit_ts < PROGRESS_INTERVAL:
+            return
+
+        self._last_emit_ts = now
+        self._last_emit_state = state
+        self.state_signal.emit((state[0], total, processed, groups))
@@ -2,6 +2,10 @@ from pathlib import Path
 
 MODEL_DIR = Path("models")
 EMBED_MODEL_NAME = "all-MiniLM-L6-v2" 
-CHAT_MODEL_FILENAME = "Llama-3.2-3B-Instruct-Q4_K_M.gguf"
+EMBED_DIM = 384 # MiniLM output dimension
+CHAT_MODEL_STEM = "Llama-3.2-3B-Instruct"
+CHAT_MODEL_QUANTS = ("Q4_K_M", "Q5_K_M", "Q8_0") # Smallest first, first one found is loaded
+CHAT_MODEL_FILENAME = f"{CHAT_MODEL_STEM}-{CHAT_MODEL_QUANTS[0]}.gguf"
 CHAT_MODEL_URL = "https://huggingface.co/bartowski/Llama-3.2-3B-Instruct-GGUF/resolve/main/Llama-3.2-3B-Instruct-Q4_K_M.gguf"
-CHAT_MODEL_PATH = MODEL_DIR / CHAT_MODEL_FILENAME
\ No newline at end of file
+CHAT_MODEL_PATH = MODEL_DIR / CHAT_MODEL_FILENAME
+CACHE_PATH = MODEL_DIR / "cache.db" # Extracted text + embeddings per file
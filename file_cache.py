@@ -0,0 +1,111 @@
+import sqlite3
+import logging
+import numpy as np
+from contextlib import closing
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CacheKey = Tuple[str, int, int] # (path, mtime_ns, size)
+INT8_SCALE = 127 # Unit vectors have components in [-1, 1]
+
+class FileCache:
+    """
+    Persistent store of extracted text and embeddings (SQLite).
+    Rows are keyed by path and only reused while the file's mtime and size match.
+    Embeddings are unit vectors stored as int8 (1 byte per dimension instead of 4).
+    """
+
+    def __init__(self, db_path: Path):
+        self.db_path = db_path
+
+    def _connect(self):
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            "path TEXT PRIMARY KEY, mtime INTEGER, size INTEGER, text TEXT, dim INT, vec BLOB)"
+        )
+        return conn
+
+    @staticmethod
+    def make_key(file_path: Path) -> Optional[CacheKey]:
+        """Builds the lookup key; None if the file can't be stat'ed."""
+        try:
+            st = file_path.stat()
+        except OSError:
+            return None
+        return (str(file_path), st.st_mtime_ns, st.st_size)
+
+    def _select(self, keys: List[Optional[CacheKey]], columns: str) -> List[Optional[tuple]]:
+        """Fetches the given columns for every key whose file is unchanged."""
+        rows: List[Optional[tuple]] = [None] * len(keys)
+        try:
+            with closing(self._connect()) as conn:
+                for i, key in enumerate(keys):
+                    if key is None: continue
+                    row = conn.execute(
+                        f"SELECT mtime, size, {columns} FROM files WHERE path = ?", (key[0],)
+                    ).fetchone()
+                    if row and tuple(row[:2]) == key[1:]:
+                        rows[i] = row[2:]
+        except (sqlite3.Error, OSError) as e:
+            logger.warning("File cache read error: %s", e)
+        return rows
+
+    def lookup_texts(self, keys: List[Optional[CacheKey]]) -> List[Optional[str]]:
+        """Returns the cached text for each key, or None on a miss."""
+        return [row[0] if row else None for row in self._select(keys, "text")]
+
+    def lookup_vectors(self, keys: List[Optional[CacheKey]], dim: int) -> List[Optional[np.ndarray]]:
+        """Returns the cached embedding for each key, or None on a miss."""
+        return [
+            np.frombuffer(row[1], dtype=np.int8).astype(np.float32) / INT8_SCALE
+            # Length check also skips rows written in the older float32 format
+            if row and row[0] == dim and row[1] is not None and len(row[1]) == dim else None
+            for row in self._select(keys, "dim, vec")
+        ]
+
+    def store_texts(self, keys: List[Optional[CacheKey]], texts: List[str]):
+        """Saves extracted text (replacing any stale row) in a single transaction."""
+        rows = [(*key, text) for key, text in zip(keys, texts) if key is not None]
+        if not rows: return
+        try:
+            with closing(self._connect()) as conn, conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO files (path, mtime, size, text) VALUES (?, ?, ?, ?)", rows
+                )
+        except (sqlite3.Error, OSError) as e:
+            logger.warning("File cache write error: %s", e)
+
+    def store_vectors(self, keys: List[Optional[CacheKey]], vectors: np.ndarray):
+        """Attaches embeddings to the rows saved by store_texts."""
+        rows = [
+            (vec.shape[0], np.clip(np.rint(vec * INT8_SCALE), -INT8_SCALE, INT8_SCALE).astype(np.int8).tobytes(), *key)
+            for key, vec in zip(keys, vectors) if key is not None
+        ]
+        if not rows: return
+        try:
+            with closing(self._connect()) as conn, conn:
+                conn.executemany(
+                    "UPDATE files SET dim = ?, vec = ? WHERE path = ? AND mtime = ? AND size = ?", rows
+                )
+        except (sqlite3.Error, OSError) as e:
+            logger.warning("File cache write error: %s", e)
+
+    def relocate(self, moves: List[Tuple[str, str]]):
+        """
+        Points rows at the new paths of moved files (mtime and size survive a move),
+        so organizing a folder doesn't leave rows behind at paths that no longer exist.
+        Only the moved paths are touched; rows for other folders and drives are kept.
+        """
+        renames = [(new, old) for old, new in moves if new != old]
+        if not renames: return
+        try:
+            with closing(self._connect()) as conn, conn:
+                conn.executemany("UPDATE OR REPLACE files SET path = ? WHERE path = ?", renames)
+        except (sqlite3.Error, OSError) as e:
+            logger.warning("File cache write error: %s", e)
@@ -26,6 +26,7 @@ def build_executable():
         '--hidden-import=sentence_transformers',
         '--hidden-import=ollama',
         '--hidden-import=pypdf',
+        '--hidden-import=pypdfium2',
         '--hidden-import=docx',
         '--hidden-import=pptx',
         '--hidden-import=openpyxl',
@@ -44,6 +45,11 @@ def build_executable():
         '--onedir', 
     ]
 
+    # Bundle the UI font when present (app.py falls back to system monospace)
+    font_file = os.path.join('assets', 'FiraCode-Regular.ttf')
+    if os.path.exists(font_file):
+        args.append(f'--add-data={font_file}{os.pathsep}assets')
+
     # Run PyInstaller
     PyInstaller.__main__.run(args)
 
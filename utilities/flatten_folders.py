@@ -8,30 +8,45 @@ def flatten_directory(root_dir):
 
     root_dir = os.path.abspath(root_dir)
 
-    for current_path, folders, files in os.walk(root_dir, topdown=False):
-        # Skip the root folder itself
-        if current_path == root_dir:
-            continue
+    # Names already taken in root_dir (kept in memory instead of probing with exists)
+    with os.scandir(root_dir) as it:
+        root_entries = list(it)
+    existing = {entry.name for entry in root_entries}
 
-        for file in files:
-            src = os.path.join(current_path, file)
-            dst = os.path.join(root_dir, file)
+    # Iterative DFS over subfolders (symlinked folders are not followed, like os.walk)
+    pending = [entry.path for entry in root_entries if entry.is_dir() and not entry.is_symlink()]
+    visited = []
+
+    while pending:
+        current_path = pending.pop()
+        visited.append(current_path)
+
+        with os.scandir(current_path) as it:
+            entries = list(it)
+
+        for entry in entries:
+            if entry.is_dir():
+                if not entry.is_symlink():
+                    pending.append(entry.path)
+                continue
+
+            name = entry.name
 
             # If filename already exists, create a unique name
-            if os.path.exists(dst):
-                base, ext = os.path.splitext(file)
+            if name in existing:
+                base, ext = os.path.splitext(name)
                 counter = 1
-                while True:
-                    new_name = f"{base}_{counter}{ext}"
-                    dst = os.path.join(root_dir, new_name)
-                    if not os.path.exists(dst):
-                        break
+                name = f"{base}_{counter}{ext}"
+                while name in existing:
                     counter += 1
+                    name = f"{base}_{counter}{ext}"
+            existing.add(name)
 
             # Move file
-            shutil.move(src, dst)
+            shutil.move(entry.path, os.path.join(root_dir, name))
 
-        # After moving files, remove empty folder
+    # Remove emptied folders, deepest first
+    for current_path in reversed(visited):
         try:
             os.rmdir(current_path)
         except OSError:
@@ -41,4 +56,4 @@ def flatten_directory(root_dir):
 
 if __name__ == "__main__":
     target_directory = r"E:\experiment_1"
-    flatten_directory(target_directory)
\ No newline at end of file
+    flatten_directory(target_directory)
@@ -1,3 +1,6 @@
+from functools import lru_cache
+
+@lru_cache(maxsize=None)
 def optional_import(name, attr=None):
     try:
         module = __import__(name, fromlist=[attr] if attr else [])
@@ -1,33 +1,70 @@
 import os
+import re
+import logging
+import warnings
+import threading
+import importlib.util
 import numpy as np
 import urllib.request
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
 from pathlib import Path
-from typing import List, Generator, Tuple
+from typing import Callable, List, Generator, Iterator, Optional, Tuple
 from utilities.helper import optional_import
+from file_cache import CacheKey, FileCache
 from constants import (
     CHAT_MODEL_PATH, 
     CHAT_MODEL_URL, 
     CHAT_MODEL_FILENAME, 
+    CHAT_MODEL_STEM,
+    CHAT_MODEL_QUANTS,
     EMBED_MODEL_NAME, 
+    EMBED_DIM,
+    CACHE_PATH,
     MODEL_DIR
 )
 
-try:
-    from sentence_transformers import SentenceTransformer
-    from sklearn.cluster import AgglomerativeClustering
-    from llama_cpp import Llama
-    AI_AVAILABLE = True
-except ImportError as e:
-    print(f"AI Import Error: {e}")
-    AI_AVAILABLE = False
-    
-pypdf = optional_import("pypdf")
-Document = optional_import("docx", "Document")
-Presentation = optional_import("pptx", "Presentation")
-openpyxl = optional_import("openpyxl")
+logger = logging.getLogger(__name__)
+
+# Heavy AI/parsing libraries are imported on first use, so the
+# extension and date modes start without loading torch or sklearn.
+AI_AVAILABLE = all(importlib.util.find_spec(m) for m in ("sentence_transformers", "sklearn", "llama_cpp"))
+if not AI_AVAILABLE:
+    logger.warning("AI Import Error: sentence_transformers, scikit-learn or llama-cpp-python not installed")
+
+# Text extraction: parsing is IO-heavy, so use more threads than cores
+EXTRACT_WORKERS = min(32, (os.cpu_count() or 1) * 2)
+_open_files = threading.BoundedSemaphore(64)
+_pdfium_lock = threading.Lock()
+MAX_TEXT_CHARS = 4000 # Text kept per document
+
+DOWNLOAD_CHUNK = 4 * 1024 * 1024 # Model download buffer
+DOWNLOAD_PARTS = 8 # Parallel HTTP range requests for large downloads
+
+# Clustering: k-NN graph settings for large document sets
+CLUSTER_GRAPH_MIN_SAMPLES = 200 # Below this, Agglomerative's O(N^2) cost is negligible
+CLUSTER_KNN = 16
+# Ward merge threshold (1.5 is a good balance for MiniLM)
+# Lower = More small specific folders
+# Higher = Fewer giant generic folders
+CLUSTER_DISTANCE_THRESHOLD = 1.5
+
+# Naming: clusters per LLM prompt (sized to fit n_ctx=2048)
+NAMING_BATCH = 8
+NAMING_MAX_TOKENS = 8 # A 3-word PascalCase name is ~6 tokens
+NAMING_SYSTEM_PROMPT = (
+    "You are a file organizer. "
+    "Task: Generate a short, concise folder name (max 3 words) for each group of files. "
+    "Rules: No punctuation. Use Underscores. PascalCase. No sentences. No explanation. No generic names like 'Files'."
+    "If unsure, output 'Documents'.\n\n"
+)
+_FOLDER_NAME_STRIP_RE = re.compile(r'Folder Name:|[^\w-]+') # Keep letters, digits, "_" and "-"
+_LIST_PREFIX_RE = re.compile(r'^\s*(?:Cluster\s*)?\d+\s*[:.)]\s*', re.IGNORECASE) # "1. Name"
 
 _embed_instance = None
 _chat_instance = None
+_embed_lock = threading.Lock()
+_chat_lock = threading.Lock()
+file_cache = FileCache(CACHE_PATH)
 
 def get_embed_model():
     """Loads the fast SentenceTransformer model."""
@@ -35,149 +72,430 @@ def get_embed_model():
     if not AI_AVAILABLE: raise ImportError("AI modules not loaded.")
     
     if _embed_instance is None:
-        # This automatically downloads the ~90MB model to your local cache
-        # It is highly optimized for CPU.
-        _embed_instance = SentenceTransformer(EMBED_MODEL_NAME) #type: ignore
+        with _embed_lock:
+            if _embed_instance is None:
+                from sentence_transformers import SentenceTransformer
+                # This automatically downloads the ~90MB model to your local cache
+                # It is highly optimized for CPU.
+                model = SentenceTransformer(EMBED_MODEL_NAME) #type: ignore
+                if model.device.type == "cpu":
+                    model = _quantize_int8(model)
+                # Spin up torch's thread pools now rather than in the first real batch
+                model.encode(["warmup"], show_progress_bar=False)
+                _embed_instance = model
     return _embed_instance
 
+def _quantize_int8(model):
+    """Dynamic int8 quantization of the Linear layers (~4x smaller weights on CPU)."""
+    try:
+        import torch
+        return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    except Exception as e:
+        # No quantized engine on this platform: keep fp32
+        logger.warning("Embedding quantization skipped: %s", e)
+        return model
+
 def get_chat_model():
     """Loads the GGUF model for naming folders."""
     global _chat_instance
     if not AI_AVAILABLE: raise ImportError("AI modules not loaded.")
     
     if _chat_instance is None:
-        if not CHAT_MODEL_PATH.exists():
-            raise FileNotFoundError(f"Chat model missing: {CHAT_MODEL_PATH}")
-        
-        # Load GGUF Model
-        _chat_instance = Llama( #type: ignore
-            model_path=str(CHAT_MODEL_PATH),
-            n_ctx=2048,
-            verbose=False,
-            n_threads=4
-        )
+        with _chat_lock:
+            if _chat_instance is None:
+                model_path = find_chat_model()
+                if model_path is None:
+                    raise FileNotFoundError(f"Chat model missing: {CHAT_MODEL_PATH}")
+                
+                # Load GGUF Model
+                import llama_cpp
+                n_threads = os.cpu_count() or 4
+                # Offload every layer when llama.cpp was built with CUDA/Metal/Vulkan
+                gpu_offload = getattr(llama_cpp, "llama_supports_gpu_offload", lambda: False)()
+                _chat_instance = llama_cpp.Llama( #type: ignore
+                    model_path=str(model_path),
+                    n_gpu_layers=-1 if gpu_offload else 0,
+                    n_ctx=2048,
+                    n_batch=512, # Prefill the naming prompt in large chunks
+                    use_mmap=True,
+                    use_mlock=True, # Keep weights resident between naming calls
+                    verbose=False,
+                    n_threads=n_threads,
+                    n_threads_batch=n_threads
+                )
     return _chat_instance
 
-def scan_files(path: str) -> List[Path]:
-    files = []
+def prewarm():
+    """Loads both models on background threads, so loading overlaps file scanning and extraction."""
+    if not AI_AVAILABLE: return
+    loaders = [get_embed_model]
+    if find_chat_model() is not None: loaders.append(get_chat_model)
+    for loader in loaders:
+        threading.Thread(target=_load_quietly, args=(loader,), daemon=True).start()
+
+def _load_quietly(loader: Callable):
+    try:
+        loader()
+    except Exception as e:
+        # The real call reports the error again when the model is needed
+        logger.warning("Model preload error: %s", e)
+
+def find_chat_model() -> Optional[Path]:
+    """Returns the smallest quantization of the chat model on disk, if any."""
+    for quant in CHAT_MODEL_QUANTS:
+        path = MODEL_DIR / f"{CHAT_MODEL_STEM}-{quant}.gguf"
+        if path.exists(): return path
+    return None
+
+def scan_files(path: str) -> Iterator[os.DirEntry]:
+    """
+    Yields the regular files of a folder straight from scandir.
+    DirEntry already carries name/path (and stat on Windows), so no Path objects are built.
+    """
     try:
-        for entry in os.scandir(path):
-            if entry.is_file():
-                files.append(Path(entry.path))
+        with os.scandir(path) as it:
+            for entry in it:
+                if entry.is_file(follow_symlinks=False):
+                    yield entry
     except PermissionError:
         pass
-    return files
+
+_TEXT_SUFFIXES = frozenset({'.txt', '.md', '.py', '.js', '.c', '.cpp', '.h', '.java', '.json', '.xml', '.yml', '.sql', '.sh'})
+
+# Deletes non-alphanumeric Latin-1 characters (for the fallback's text heuristic)
+_NON_ALNUM_TABLE = str.maketrans('', '', ''.join(chr(c) for c in range(256) if not chr(c).isalnum()))
+
+# Extraction handlers return None when a file could not be read (error or missing
+# parser), as opposed to "" for a readable file without text. Only the latter is cached.
+def _unreadable(file_path: Path, error: Exception) -> None:
+    logger.warning("Error reading %s: %s", file_path.name, error)
+
+def _missing_parser(file_path: Path, package: str) -> None:
+    logger.warning("Skipping %s: %s is not installed", file_path.name, package)
+
+def _read_text(file_path: Path) -> Optional[str]:
+    try:
+        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+            return f.read(MAX_TEXT_CHARS)
+    except OSError as e:
+        return _unreadable(file_path, e)
+
+def _extract_csv(file_path: Path) -> Optional[str]:
+    lines = []
+    try:
+        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+            for _ in range(30): # Read first 30 lines
+                line = f.readline()
+                if not line: break
+                lines.append(line)
+    except OSError as e:
+        return _unreadable(file_path, e)
+    return "".join(lines)
+
+def _extract_pdf(file_path: Path) -> Optional[str]:
+    """Text of the first 3 PDF pages, stopping once MAX_TEXT_CHARS are collected."""
+    buf, total = [], 0
+    pdfium = optional_import("pypdfium2")
+    if pdfium is not None:
+        # PDFium (C++) is much faster than pypdf, but not thread-safe
+        try:
+            with _pdfium_lock:
+                pdf = pdfium.PdfDocument(str(file_path))
+                try:
+                    for i in range(min(3, len(pdf))):
+                        page = pdf[i]
+                        text_page = page.get_textpage()
+                        chunk = text_page.get_text_range()
+                        text_page.close()
+                        page.close()
+                        buf.append(chunk)
+                        total += len(chunk)
+                        if total >= MAX_TEXT_CHARS: break
+                finally:
+                    pdf.close()
+        except Exception as e:
+            return _unreadable(file_path, e)
+        return "\n".join(buf)
+
+    pypdf = optional_import("pypdf")
+    if pypdf is None: return _missing_parser(file_path, "pypdfium2 or pypdf")
+    try:
+        with open(file_path, 'rb') as f:
+            reader = pypdf.PdfReader(f) #type: ignore
+            # Read max 3 pages to save time
+            for page in reader.pages[:3]:
+                extracted = page.extract_text()
+                if not extracted: continue
+                buf.append(extracted)
+                total += len(extracted)
+                if total >= MAX_TEXT_CHARS: break
+    except Exception as e:
+        return _unreadable(file_path, e)
+    return "\n".join(buf)
+
+def _extract_docx(file_path: Path) -> Optional[str]:
+    Document = optional_import("docx", "Document")
+    if Document is None: return _missing_parser(file_path, "python-docx")
+    buf, total = [], 0
+    try:
+        doc = Document(file_path) #type: ignore
+        for para in doc.paragraphs:
+            buf.append(para.text)
+            total += len(para.text) + 1
+            if total >= MAX_TEXT_CHARS: break
+    except Exception as e:
+        return _unreadable(file_path, e)
+    return "\n".join(buf)
+
+def _extract_pptx(file_path: Path) -> Optional[str]:
+    Presentation = optional_import("pptx", "Presentation")
+    if Presentation is None: return _missing_parser(file_path, "python-pptx")
+    chunks = []
+    try:
+        prs = Presentation(file_path) #type: ignore
+        for i, slide in enumerate(prs.slides):
+            if i > 5: break 
+            for shape in slide.shapes:
+                if hasattr(shape, "text"):
+                    chunks.append(shape.text) #type: ignore
+    except Exception as e:
+        return _unreadable(file_path, e)
+    return "\n".join(chunks)
+
+def _extract_xlsx(file_path: Path) -> Optional[str]:
+    openpyxl = optional_import("openpyxl")
+    if openpyxl is None: return _missing_parser(file_path, "openpyxl")
+    chunks = []
+    try:
+        wb = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+        ws = wb.active
+        for i, row in enumerate(ws.iter_rows(values_only=True)): #type: ignore
+            if i > 20: break
+            chunks.append(" ".join([str(cell) for cell in row if cell is not None]))
+        wb.close()
+    except Exception as e:
+        return _unreadable(file_path, e)
+    return "\n".join(chunks)
+
+def _extract_fallback(file_path: Path) -> Optional[str]:
+    """Fallback for generic text files."""
+    try:
+        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+            content = f.read(1000)
+    except OSError:
+        return None
+    # Simple heuristic: is it mostly alphanumeric?
+    alnum_count = len(content.translate(_NON_ALNUM_TABLE))
+    return content if alnum_count > len(content) * 0.3 else ""
+
+_HANDLERS: dict[str, Callable[[Path], Optional[str]]] = {
+    '.csv': _extract_csv,
+    '.pdf': _extract_pdf,
+    '.docx': _extract_docx,
+    '.pptx': _extract_pptx,
+    '.xlsx': _extract_xlsx,
+}
 
 def extract_text(file_path: Path) -> str:
-    """Robust text extraction for multiple file formats."""
-    text = ""
+    """Robust text extraction for multiple file formats ("" if the file can't be read)."""
+    return _extract(file_path) or ""
+
+def _extract(file_path: Path) -> Optional[str]:
+    """Like extract_text, but None if the file could not be read (each handler reports why)."""
     suffix = file_path.suffix.lower()
+    if suffix in _TEXT_SUFFIXES:
+        handler = _read_text
+    else:
+        handler = _HANDLERS.get(suffix, _extract_fallback)
     
+    with _open_files: # Bound open handles when called from many threads
+        text = handler(file_path)
+    return None if text is None else text[:MAX_TEXT_CHARS] # Limit context size
+
+def extract_texts(paths: List[Path],
+                  progress_cb: Optional[Callable[[int, int], bool]] = None) -> List[str]:
+    """
+    Extracts text from many files on a thread pool (parsing overlaps disk IO).
+    Unchanged files are served from the file cache without being opened; files
+    that could not be read are returned as "" and not cached, so they are retried.
+    Results are in the same order as paths. progress_cb(done, total) runs after
+    every file and may return False to stop early (the result is then shorter).
+    """
+    keys = [FileCache.make_key(p) for p in paths]
+    cached = file_cache.lookup_texts(keys)
+    misses = [paths[i] for i, text in enumerate(cached) if text is None]
+    fresh_keys: List[Optional[CacheKey]] = []
+    fresh: List[str] = []
+
+    texts: List[str] = []
+    executor = ThreadPoolExecutor(max_workers=EXTRACT_WORKERS)
     try:
-        if suffix in ['.txt', '.md', '.py', '.js', '.c', '.cpp', '.h', '.java', '.json', '.xml', '.yml', '.sql', '.sh']:
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                text = f.read()
-        elif suffix == '.csv':
-             with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                lines = [f.readline() for _ in range(30)] # Read first 30 lines
-                text = "\n".join(lines)
-        elif suffix == '.pdf':
-            with open(file_path, 'rb') as f:
-                reader = pypdf.PdfReader(f) #type: ignore
-                # Read max 3 pages to save time
-                for page in reader.pages[:3]:
-                    extracted = page.extract_text()
-                    if extracted: text += extracted + "\n"
-        elif suffix == '.docx':
-            doc = Document(file_path) #type: ignore
-            for i, para in enumerate(doc.paragraphs):
-                if i > 50: break
-                text += para.text + "\n"
-        elif suffix == '.pptx' and Presentation:
-            prs = Presentation(file_path) #type: ignore
-            for i, slide in enumerate(prs.slides):
-                if i > 5: break 
-                for shape in slide.shapes:
-                    if hasattr(shape, "text"):
-                        text += shape.text + "\n" #type: ignore
-        elif suffix == '.xlsx' and openpyxl:
-            wb = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
-            ws = wb.active
-            for i, row in enumerate(ws.iter_rows(values_only=True)): #type: ignore
-                if i > 20: break
-                row_text = " ".join([str(cell) for cell in row if cell is not None])
-                text += row_text + "\n"
-            wb.close()
-        else:
-            # Fallback for generic text files
-            try:
-                with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                    content = f.read(1000)
-                    # Simple heuristic: is it mostly alphanumeric?
-                    if sum(c.isalnum() for c in content) > len(content) * 0.3:
-                        text = content
-            except: pass
-        
-        return text[:4000] # Limit context size
-    except Exception as e:
-        print(f"Error reading {file_path.name}: {e}")
-        return ""
+        extracted = executor.map(_extract, misses)
+        for key, text in zip(keys, cached):
+            if text is None:
+                text = next(extracted)
+                if text is not None:
+                    fresh_keys.append(key)
+                    fresh.append(text)
+            texts.append(text or "")
+            if progress_cb and progress_cb(len(texts), len(paths)) is False:
+                break
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+        file_cache.store_texts(fresh_keys, fresh)
+    return texts
+
+def generate_embedding(content: str) -> np.ndarray:
+    """Single-document wrapper around generate_embeddings_batch (kept for compatibility)."""
+    return generate_embeddings_batch([content])[0]
 
-def generate_embedding(content: str) -> List[float]:
-    """Generates high-quality vectors using Sentence-Transformers."""
+def generate_embeddings_batch(contents: List[str], batch_size: int = 64,
+                              progress_cb: Optional[Callable[[int, int], bool]] = None) -> np.ndarray:
+    """
+    Encodes many documents with batched forward passes.
+    Returns an (N, EMBED_DIM) float32 array of unit vectors; empty texts stay zero vectors.
+    progress_cb(done, total) runs after every batch and may return False to stop.
+    """
     if not AI_AVAILABLE: raise ImportError("AI modules not loaded")
-    
+
+    vectors = np.zeros((len(contents), EMBED_DIM), dtype=np.float32)
+    clean = [c[:1500].replace('\n', ' ').strip() for c in contents]
+
+    # Longest first, so each batch holds similar lengths and wastes little padding
+    indices = sorted((i for i, c in enumerate(clean) if c), key=lambda i: len(clean[i]), reverse=True)
+
     try:
         model = get_embed_model()
-        clean_content = content[:1500].replace('\n', ' ').strip()
-        
-        if not clean_content: 
-            return [0.0] * 384 # MiniLM dimension is 384
-            
-        # .encode returns a numpy array, convert to list
-        vector = model.encode(clean_content, batch_size=32, show_progress_bar=False).tolist()
-        return vector
-            
+        for start in range(0, len(indices), batch_size):
+            batch = indices[start:start + batch_size]
+            vectors[batch] = model.encode(
+                [clean[i] for i in batch],
+                batch_size=batch_size,
+                show_progress_bar=False,
+                normalize_embeddings=True,
+                convert_to_numpy=True
+            )
+            if progress_cb and progress_cb(start + len(batch), len(indices)) is False:
+                break
     except Exception as e:
-        print(f"Embedding Gen Error: {e}")
-        return [0.0] * 384
+        logger.warning("Embedding Gen Error: %s", e)
+
+    return vectors
+
+def embed_documents(files: List[Path], contents: List[str], batch_size: int = 64,
+                    progress_cb: Optional[Callable[[int, int], bool]] = None) -> np.ndarray:
+    """
+    Like generate_embeddings_batch, but reuses cached vectors for unchanged files
+    and only encodes (then caches) the misses.
+    """
+    keys = [FileCache.make_key(f) for f in files]
+    cached = file_cache.lookup_vectors(keys, EMBED_DIM)
+
+    vectors = np.empty((len(contents), EMBED_DIM), dtype=np.float32)
+    misses = []
+    for i, vec in enumerate(cached):
+        if vec is None:
+            misses.append(i)
+        else:
+            vectors[i] = vec
+
+    if misses:
+        fresh = generate_embeddings_batch([contents[i] for i in misses], batch_size, progress_cb)
+        vectors[misses] = fresh
+        # Zero rows mean the encode was stopped or failed; don't cache those
+        encoded = np.any(fresh, axis=1)
+        file_cache.store_vectors([keys[i] for i, ok in zip(misses, encoded) if ok], fresh[encoded])
 
-def cluster_embeddings(embeddings_list: List[List[float]]):
+    return vectors
+
+def cluster_embeddings(np_embeddings: np.ndarray):
     """
-    Clusters using Agglomerative Clustering with Dynamic Threshold.
-    This automatically decides 'How many groups' based on content.
+    Groups documents by similarity; the number of groups is decided by the content.
+    Uses ward Agglomerative Clustering with a distance threshold. From
+    CLUSTER_GRAPH_MIN_SAMPLES on (and with faiss installed), merges are limited
+    to an approximate k-NN graph, avoiding the O(N^2) cost.
+    Takes the (N, D) float32 array from the encoder (rows normalized in place).
     """
     if not AI_AVAILABLE: raise ImportError("AI modules not loaded")
     
-    n_samples = len(embeddings_list)
+    n_samples = len(np_embeddings)
     if n_samples == 0: return []
     if n_samples == 1: return [0]
 
     try:
-        np_embeddings = np.array(embeddings_list, dtype=np.float32)
-        
-        # Normalize vectors (Important for Cosine Similarity / Euclidean distance)
-        norms = np.linalg.norm(np_embeddings, axis=1, keepdims=True)
-        norms[norms == 0] = 1
-        normalized_embeddings = np_embeddings / norms
-        
-        # Use Distance Threshold (1.5 is a good balance for MiniLM)
-        # Lower = More small specific folders
-        # Higher = Fewer giant generic folders
-        clustering = AgglomerativeClustering( #type: ignore
-            n_clusters=None, # Auto-detect number of clusters
-            distance_threshold=1.5, 
-            metric='euclidean', 
-            linkage='ward'
-        )
-        
-        return clustering.fit_predict(normalized_embeddings)
+        # Important for Cosine Similarity / Euclidean distance
+        _normalize_rows(np_embeddings)
+
+        if n_samples >= CLUSTER_GRAPH_MIN_SAMPLES and optional_import("faiss"):
+            return _cluster_knn_graph(np_embeddings)
+        return _cluster_agglomerative(np_embeddings)
         
     except Exception as e:
-        print(f"Clustering error: {e}")
+        logger.warning("Clustering error: %s", e)
         # Fallback: put everyone in group 0
         return [0] * n_samples
 
+def _normalize_rows(x: np.ndarray):
+    """L2-normalizes rows in place; a no-op when the encoder already returned unit vectors."""
+    sq = np.einsum('ij,ij->i', x, x) # Squared norms in one pass, no x*x temporary
+    if np.allclose(sq[sq > 0], 1.0, atol=1e-4): return
+    np.sqrt(sq, out=sq)
+    sq[sq == 0] = 1 # Leave zero vectors (empty texts) as they are
+    np.divide(x, sq[:, None], out=x)
+
+def _cluster_agglomerative(np_embeddings: np.ndarray, connectivity=None):
+    from sklearn.cluster import AgglomerativeClustering
+
+    clustering = AgglomerativeClustering( #type: ignore
+        n_clusters=None, # Auto-detect number of clusters
+        distance_threshold=CLUSTER_DISTANCE_THRESHOLD, 
+        metric='euclidean', 
+        linkage='ward',
+        connectivity=connectivity
+    )
+    
+    with warnings.catch_warnings():
+        # A k-NN graph is usually split into several components; sklearn links them itself
+        warnings.filterwarnings("ignore", message="the number of connected components")
+        return clustering.fit_predict(np_embeddings)
+
+def _cluster_knn_graph(np_embeddings: np.ndarray):
+    """
+    Ward clustering restricted to HNSW k-NN edges: same merge rule and threshold
+    as the small-set path, but only O(N * k) candidate pairs instead of O(N^2).
+    """
+    import faiss
+    from scipy.sparse import csr_matrix
+
+    n_samples, dim = np_embeddings.shape
+    k = min(CLUSTER_KNN, n_samples)
+
+    # Inner product on unit vectors == cosine similarity; vectors kept as int8 codes
+    vectors = np.ascontiguousarray(np_embeddings, dtype=np.float32)
+    index = faiss.IndexHNSWSQ(dim, faiss.ScalarQuantizer.QT_8bit, 32, faiss.METRIC_INNER_PRODUCT)
+    index.train(vectors) # Learns the per-dimension int8 ranges
+    index.add(vectors)
+    _, neighbors = index.search(vectors, k)
+
+    keep = neighbors >= 0 # -1 = no neighbor found
+    rows = np.repeat(np.arange(n_samples), k).reshape(n_samples, k)[keep]
+    graph = csr_matrix(
+        (np.ones(len(rows), dtype=np.int8), (rows, neighbors[keep])),
+        shape=(n_samples, n_samples)
+    )
+    return _cluster_agglomerative(np_embeddings, connectivity=graph + graph.T)
+
+def _clean_folder_name(content: str) -> str:
+    clean_name = _FOLDER_NAME_STRIP_RE.sub("", content)[:25]
+    return clean_name if clean_name else "Misc_Docs"
+
+def _file_previews(files: List[Path], texts: List[str], limit: int, chars: int) -> str:
+    file_previews = []
+    for f, text in zip(files[:limit], texts):
+        content_preview = text[:chars].replace('\n', ' ')
+        file_previews.append(f"- {f.name}: {content_preview}...")
+    return "\n".join(file_previews)
+
 def get_smart_folder_name(files_in_cluster: List[Path], file_texts: List[str]) -> str:
     """Categorize files using the Local LLM (Llama/Qwen)."""
     if not AI_AVAILABLE: return "Group"
@@ -185,43 +503,80 @@ def get_smart_folder_name(files_in_cluster: List[Path], file_texts: List[str]) -
         llm = get_chat_model()
 
         # Create a prompt with previews of 7 files
-        file_previews = []
-        for i, f in enumerate(files_in_cluster[:7]): 
-            content_preview = file_texts[i][:150].replace('\n', ' ') 
-            file_previews.append(f"- {f.name}: {content_preview}...")
-
-        input_data = "\n".join(file_previews)
-        
-        system_prompt = (
-            "You are a file organizer. "
-            "Task: Generate a short, concise folder name (max 3 words) for these files. "
-            "Rules: No punctuation. Use Underscores. PascalCase. No sentences. No explanation. No generic names like 'Files'."
-            "If unsure, output 'Documents'.\n\n"
-        )
+        input_data = _file_previews(files_in_cluster, file_texts, limit=7, chars=150)
         user_prompt = f"Files:\n{input_data}\n\nFolder Name:"
 
+        # The system prompt is the same leading message in every naming call, so
+        # llama.cpp keeps its KV state from the previous call and only prefills the files.
         response = llm.create_chat_completion(
             messages=[
-                {"role": "system", "content": system_prompt},
+                {"role": "system", "content": NAMING_SYSTEM_PROMPT},
                 {"role": "user", "content": user_prompt}
             ],
             temperature=0.1, # Low temp for deterministic naming
-            max_tokens=15
+            max_tokens=NAMING_MAX_TOKENS
         )
         
         content = response['choices'][0]['message']['content'].strip() # type: ignore
-        
-        # Cleanup
-        content = content.replace("Folder Name:", "").replace('"', '').strip()
-        clean_name = "".join([c for c in content if c.isalnum() or c in ('_', '-')])
-        
-        if len(clean_name) > 25: clean_name = clean_name[:25]
-        return clean_name if clean_name else "Misc_Docs"
+        return _clean_folder_name(content)
         
     except Exception as e:
-        print(f"Naming error: {e}")
+        logger.warning("Naming error: %s", e)
         return "Group"
 
+def name_clusters(clusters: List[Tuple[List[Path], List[str]]],
+                  progress_cb: Optional[Callable[[int, int], bool]] = None) -> List[str]:
+    """
+    Names many clusters with one LLM prompt per NAMING_BATCH clusters, so the
+    prompt prefill is paid once per batch instead of once per cluster.
+    Batches whose reply can't be matched up fall back to get_smart_folder_name.
+    progress_cb(done, total) runs after every batch and may return False to stop
+    (the returned list then only covers the clusters named so far).
+    """
+    if not AI_AVAILABLE: return ["Group"] * len(clusters)
+
+    names: List[str] = []
+    for start in range(0, len(clusters), NAMING_BATCH):
+        batch = clusters[start:start + NAMING_BATCH]
+        names.extend(_name_cluster_batch(batch))
+        if progress_cb and progress_cb(len(names), len(clusters)) is False:
+            break
+    return names
+
+def _name_cluster_batch(batch: List[Tuple[List[Path], List[str]]]) -> List[str]:
+    try:
+        llm = get_chat_model()
+
+        # Fewer, shorter previews per cluster so the whole batch fits the context
+        sections = [
+            f"Cluster {i + 1}:\n{_file_previews(files, texts, limit=3, chars=100)}"
+            for i, (files, texts) in enumerate(batch)
+        ]
+        user_prompt = (
+            "\n\n".join(sections) +
+            f"\n\nReply with exactly {len(batch)} lines, one folder name per cluster, "
+            "in order, formatted as '<number>. <FolderName>'."
+        )
+
+        response = llm.create_chat_completion(
+            messages=[
+                {"role": "system", "content": NAMING_SYSTEM_PROMPT},
+                {"role": "user", "content": user_prompt}
+            ],
+            temperature=0.1, # Low temp for deterministic naming
+            max_tokens=(NAMING_MAX_TOKENS + 4) * len(batch) # Name plus "N. " and newline
+        )
+
+        content = response['choices'][0]['message']['content'] # type: ignore
+        lines = [_LIST_PREFIX_RE.sub("", line) for line in content.splitlines() if line.strip()]
+        if len(lines) == len(batch):
+            return [_clean_folder_name(line) for line in lines]
+        
+    except Exception as e:
+        logger.warning("Naming error: %s", e)
+
+    return [get_smart_folder_name(files, texts) for files, texts in batch]
+
 def check_local_model_ready() -> Tuple[bool, List[str]]:
     """Checks if the CHAT model is present. Embeddings download auto."""
     if not AI_AVAILABLE: return False, ["AI Dependencies missing"]
@@ -229,11 +584,110 @@ def check_local_model_ready() -> Tuple[bool, List[str]]:
     missing = []
     # We only check for the Chat Model (GGUF)
     # The Embedding model is handled by SentenceTransformer cache
-    if not CHAT_MODEL_PATH.exists():
+    # Any supported quantization will do, Q4_K_M is downloaded by default
+    if find_chat_model() is None:
         missing.append(CHAT_MODEL_FILENAME)
         
     return len(missing) == 0, missing
 
+def _copy_with_progress(response, f) -> Generator[str, None, None]:
+    """Copies response into f through one reused buffer, yielding progress lines."""
+    total_size = int(response.info().get('Content-Length', -1))
+    buffer = bytearray(DOWNLOAD_CHUNK)
+    view = memoryview(buffer)
+    downloaded = 0
+    last_percent = -1
+    last_report = 0
+    
+    while True:
+        n = response.readinto(buffer)
+        if not n:
+            break
+        
+        f.write(view[:n])
+        downloaded += n
+        
+        # Calculate progress
+        if total_size > 0:
+            percent = int(downloaded * 100 / total_size)
+            # Yield updates every 1% to prevent UI flooding
+            if percent > last_percent:
+                mb_down = downloaded / (1024 * 1024)
+                mb_total = total_size / (1024 * 1024)
+                # The 'Downloading:' prefix is KEY for app.py to overwrite the line
+                yield f"Downloading: {percent}% ({mb_down:.1f}MB / {mb_total:.1f}MB)"
+                last_percent = percent
+        elif downloaded - last_report >= 1024 * 1024 * 5:
+            # Fallback if Content-Length header is missing: every 5MB
+            last_report = downloaded
+            yield f"Downloading: {downloaded / (1024 * 1024):.1f}MB"
+
+    # readinto() returns 0 on a dropped connection instead of raising
+    if total_size > 0 and downloaded != total_size:
+        raise OSError(f"Connection closed early ({downloaded} of {total_size} bytes)")
+
+def _probe_ranges(url: str) -> Tuple[str, int]:
+    """HEADs the URL. Returns (final URL after redirects, size), size -1 if ranges aren't supported."""
+    request = urllib.request.Request(url, method='HEAD', headers={'Accept-Encoding': 'identity'})
+    with urllib.request.urlopen(request, timeout=30) as response:
+        size = int(response.headers.get('Content-Length', -1))
+        if response.headers.get('Accept-Ranges', '').lower() != 'bytes': size = -1
+        return response.geturl(), size
+
+def _fetch_range(url: str, dest: Path, start: int, end: int,
+                 done: List[int], part: int, cancel: threading.Event):
+    """Downloads bytes start..end (inclusive) into the same offsets of dest."""
+    request = urllib.request.Request(url, headers={'Range': f'bytes={start}-{end}', 'Accept-Encoding': 'identity'})
+    with urllib.request.urlopen(request, timeout=30) as response, open(dest, 'r+b') as f:
+        if response.status != 206: raise OSError(f"Server ignored range request (HTTP {response.status})")
+        f.seek(start) # Own handle per thread (os.pwrite is not available on Windows)
+        buffer = bytearray(DOWNLOAD_CHUNK)
+        view = memoryview(buffer)
+        while not cancel.is_set():
+            n = response.readinto(buffer)
+            if not n: break
+            f.write(view[:n])
+            done[part] += n
+
+    # readinto() returns 0 on a dropped connection instead of raising; the
+    # preallocated file would keep zeros where this part's bytes belong
+    expected = end - start + 1
+    if not cancel.is_set() and done[part] != expected:
+        raise OSError(f"Connection closed early (part {part}: {done[part]} of {expected} bytes)")
+
+def _download_ranges(url: str, dest: Path, total_size: int) -> Generator[str, None, None]:
+    """Downloads DOWNLOAD_PARTS ranges in parallel, yielding the same progress lines as _copy_with_progress."""
+    with open(dest, 'wb') as f:
+        f.truncate(total_size)
+
+    part_size = -(-total_size // DOWNLOAD_PARTS)
+    done = [0] * DOWNLOAD_PARTS # Bytes received per part (each written by one thread)
+    cancel = threading.Event()
+    executor = ThreadPoolExecutor(max_workers=DOWNLOAD_PARTS)
+    try:
+        futures = [
+            executor.submit(_fetch_range, url, dest, start, min(start + part_size, total_size) - 1, done, i, cancel)
+            for i, start in enumerate(range(0, total_size, part_size))
+        ]
+        last_percent = -1
+        pending = futures
+        while pending:
+            _, pending = wait(pending, timeout=0.2, return_when=FIRST_EXCEPTION)
+            for future in futures:
+                if future.done() and future.exception(): raise future.exception() #type: ignore
+
+            downloaded = sum(done)
+            percent = int(downloaded * 100 / total_size)
+            if percent > last_percent:
+                mb_down = downloaded / (1024 * 1024)
+                mb_total = total_size / (1024 * 1024)
+                yield f"Downloading: {percent}% ({mb_down:.1f}MB / {mb_total:.1f}MB)"
+                last_percent = percent
+    finally:
+        # Also runs when the consumer stops iterating (task cancelled)
+        cancel.set()
+        executor.shutdown(wait=True, cancel_futures=True)
+
 def download_local_model(model_filename: str) -> Generator[str, None, None]:
     """Downloads the GGUF model with progress updates."""
     MODEL_DIR.mkdir(parents=True, exist_ok=True)
@@ -244,45 +698,34 @@ def download_local_model(model_filename: str) -> Generator[str, None, None]:
     yield f"⬇️ Downloading Chat Model..."
     yield f"   Source: {url}"
 
+    # Written under a temporary name, so an interrupted download is never mistaken for the model
+    part = dest.with_name(dest.name + ".part")
+
     try:
-        # We use urlopen with chunked reading to yield progress
-        with urllib.request.urlopen(url) as response:
-            total_size = int(response.info().get('Content-Length', -1))
-            
-            with open(dest, 'wb') as f:
-                downloaded = 0
-                block_size = 8192 * 8  # 64KB buffer
-                last_percent = -1
-                
-                while True:
-                    buffer = response.read(block_size)
-                    if not buffer:
-                        break
-                    
-                    f.write(buffer)
-                    downloaded += len(buffer)
-                    
-                    # Calculate progress
-                    if total_size > 0:
-                        percent = int(downloaded * 100 / total_size)
-                        # Yield updates every 1% to prevent UI flooding
-                        if percent > last_percent:
-                            mb_down = downloaded / (1024 * 1024)
-                            mb_total = total_size / (1024 * 1024)
-                            # The 'Downloading:' prefix is KEY for app.py to overwrite the line
-                            yield f"Downloading: {percent}% ({mb_down:.1f}MB / {mb_total:.1f}MB)"
-                            last_percent = percent
-                    else:
-                        # Fallback if Content-Length header is missing
-                        if downloaded % (1024 * 1024 * 5) == 0: # Every 5MB
-                            mb_down = downloaded / (1024 * 1024)
-                            yield f"Downloading: {mb_down:.1f}MB"
+        try:
+            url, total_size = _probe_ranges(url)
+        except Exception:
+            total_size = -1 # No HEAD support, use a single stream
+
+        if total_size >= DOWNLOAD_PARTS * DOWNLOAD_CHUNK:
+            yield f"   Using {DOWNLOAD_PARTS} parallel connections"
+            yield from _download_ranges(url, part, total_size)
+        else:
+            # GGUF weights don't compress, ask for the raw bytes
+            request = urllib.request.Request(url, headers={'Accept-Encoding': 'identity'})
+            with urllib.request.urlopen(request) as response, open(part, 'wb') as f:
+                yield from _copy_with_progress(response, f)
+        os.replace(part, dest)
 
         if dest.exists() and dest.stat().st_size > 1000:
              yield f"✅ Download Complete: {model_filename}"
         else:
              yield f"❌ Download failed (Empty file)"
 
+    except GeneratorExit:
+        # Caller stopped the download
+        if part.exists(): part.unlink()
+        raise
     except Exception as e:
-        if dest.exists(): dest.unlink()
+        if part.exists(): part.unlink()
         yield f"❌ Connection Error: {str(e)}"
\ No newline at end of file